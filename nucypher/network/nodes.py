@@ -283,6 +283,7 @@ class Learner:
     details about them, and store information about them for later use.
     """
 
+    _LEARNING_CLOCK = reactor
     _SHORT_LEARNING_DELAY = 5
     _LONG_LEARNING_DELAY = 90
     LEARNING_TIMEOUT = 10
@@ -373,6 +374,7 @@ class Learner:
         self.teacher_nodes = deque()
         self._current_teacher_node = None  # type: Teacher
         self._learning_task = task.LoopingCall(self.keep_learning_about_nodes)
+        self._learning_task.clock = self._LEARNING_CLOCK
         self._learning_round = 0  # type: int
         self._rounds_without_new_nodes = 0  # type: int
         self._seed_nodes = seed_nodes or []
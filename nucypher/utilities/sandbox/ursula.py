@@ -16,6 +16,7 @@ along with nucypher.  If not, see <https://www.gnu.org/licenses/>.
 """
 
 from cryptography.x509 import Certificate
+from hendrix.deploy.tls import HendrixDeployTLS
 from typing import Set, List, Iterable, Optional
 
 from nucypher.blockchain.eth.actors import Staker
@@ -123,10 +124,11 @@ def make_ursula_for_staker(staker: Staker,
     return worker
 
 
-def start_pytest_ursula_services(ursula: Ursula) -> Certificate:
+def deploy_pytest_ursula_services(ursula: Ursula) -> HendrixDeployTLS:
     """
     Takes an ursula and starts its learning
-    services when running tests with pytest twisted.
+    services when running tests with pytest twisted;
+    Returns the deployer so that its services can be stopped again.
     """
 
     node_deployer = ursula.get_deployer()
@@ -135,5 +137,16 @@ def start_pytest_ursula_services(ursula: Ursula) -> Certificate:
     node_deployer.catalogServers(node_deployer.hendrix)
     node_deployer.start()
 
+    return node_deployer
+
+
+def start_pytest_ursula_services(ursula: Ursula) -> Certificate:
+    """
+    Takes an ursula and starts its learning
+    services when running tests with pytest twisted.
+    """
+
+    node_deployer = deploy_pytest_ursula_services(ursula=ursula)
+
     certificate_as_deployed = node_deployer.cert.to_cryptography()
     return certificate_as_deployed
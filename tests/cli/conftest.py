@@ -29,6 +29,7 @@ from nucypher.blockchain.eth.actors import ContractAdministrator
 from nucypher.blockchain.eth.networks import NetworksInventory
 from nucypher.blockchain.eth.registry import AllocationRegistry, InMemoryContractRegistry, LocalContractRegistry
 from nucypher.config.characters import UrsulaConfiguration, StakeHolderConfiguration
+from nucypher.utilities.logging import GlobalLoggerSettings
 from nucypher.utilities.sandbox.constants import (
     BASE_TEMP_DIR,
     BASE_TEMP_PREFIX,
@@ -41,12 +42,22 @@ from nucypher.utilities.sandbox.constants import (
     ONE_YEAR_IN_SECONDS, TEMPORARY_DOMAIN)
 
 
-@pytest.fixture(scope='module')
+@pytest.fixture(scope='session')
 def click_runner():
-    runner = CliRunner()
+    runner = CliRunner(mix_stderr=False)
     yield runner
 
 
+@pytest.fixture(autouse=True)
+def session_file_logging_only(monkeypatch):
+    """
+    File logging is started once for the whole session by the root conftest;
+    Prevents every CLI invocation (file logs are on by default) from attaching another pair of file observers.
+    """
+    monkeypatch.setattr(GlobalLoggerSettings, 'start_text_file_logging', lambda: None)
+    monkeypatch.setattr(GlobalLoggerSettings, 'start_json_file_logging', lambda: None)
+
+
 @pytest.fixture(scope='session')
 def deploy_user_input():
     account_index = '0\n'
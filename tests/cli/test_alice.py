@@ -19,7 +19,7 @@ def test_missing_configuration_file(default_filepath_mock, click_runner):
     result = click_runner.invoke(nucypher_cli, cmd_args, catch_exceptions=False)
     assert result.exit_code != 0
     assert default_filepath_mock.called
-    assert "run: 'nucypher alice init'" in result.output
+    assert "run: 'nucypher alice init'" in result.stderr
 
 
 def test_initialize_alice_defaults(click_runner, mocker, custom_filepath, monkeypatch):
@@ -119,7 +119,7 @@ def test_alice_cannot_init_with_dev_flag(click_runner):
                  '--dev')
     result = click_runner.invoke(nucypher_cli, init_args, catch_exceptions=False)
     assert result.exit_code == 2
-    assert 'Cannot create a persistent development character' in result.output, \
+    assert 'Cannot create a persistent development character' in result.stderr, \
         'Missing or invalid error message was produced.'
 
 
@@ -24,7 +24,7 @@ def test_destroy_with_no_configurations(click_runner, custom_filepath):
     result = click_runner.invoke(nucypher_cli, destruction_args, catch_exceptions=False)
     assert result.exit_code == 2
     assert 'Error: Invalid value for "--config-file":'
-    assert f'"{ursula_file_location}" does not exist.' in result.output
+    assert f'"{ursula_file_location}" does not exist.' in result.stderr
 
 
 def test_coexisting_configurations(click_runner,
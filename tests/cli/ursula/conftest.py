@@ -0,0 +1,96 @@
+"""
+This file is part of nucypher.
+
+nucypher is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+nucypher is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with nucypher.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import os
+
+import pytest
+import pytest_twisted as pt
+from twisted.internet.task import Clock
+
+from nucypher.blockchain.eth.actors import Worker
+from nucypher.characters.base import Learner
+from nucypher.config.characters import UrsulaConfiguration
+from nucypher.utilities.sandbox.constants import (
+    INSECURE_DEVELOPMENT_PASSWORD,
+    MOCK_IP_ADDRESS,
+    TEMPORARY_DOMAIN,
+    TEST_PROVIDER_URI
+)
+from nucypher.utilities.sandbox.ursula import deploy_pytest_ursula_services
+
+URSULA_CONFIGURATION_FILENAME = UrsulaConfiguration.generate_filename()
+
+
+@pytest.fixture(scope='module')
+def initialized_ursula_config(custom_filepath, testerchain, agency_local_registry):
+    """
+    Initializes an Ursula configuration once per module and returns its filepath.
+    'nucypher ursula init' itself is covered elsewhere; Only 'ursula run' needs to go through the CLI here.
+    """
+    alice, ursula, another_ursula, felix, staker, *all_yall = testerchain.unassigned_accounts
+
+    UrsulaConfiguration.generate(password=INSECURE_DEVELOPMENT_PASSWORD,
+                                 config_root=custom_filepath,
+                                 rest_host=MOCK_IP_ADDRESS,
+                                 domains={TEMPORARY_DOMAIN},
+                                 worker_address=another_ursula,
+                                 registry_filepath=agency_local_registry.filepath,
+                                 provider_uri=TEST_PROVIDER_URI)
+
+    another_ursula_configuration_file_location = os.path.join(custom_filepath, URSULA_CONFIGURATION_FILENAME)
+    return another_ursula_configuration_file_location
+
+
+def _stop_teacher(teacher, node_deployer) -> None:
+    if teacher._learning_task.running:
+        teacher.stop_learning_loop()
+    # Closes the teacher's listening port before the next module binds its own Ursulas
+    pt.blockon(node_deployer.hendrix.stopService())
+
+
+@pytest.fixture(scope='module')
+def running_federated_teacher(federated_ursulas):
+    """A federated ursula serving as a teacher for the duration of the module"""
+    teacher = list(federated_ursulas)[0]
+    node_deployer = deploy_pytest_ursula_services(ursula=teacher)
+    yield teacher
+    _stop_teacher(teacher, node_deployer)
+
+
+@pytest.fixture(scope='module')
+def running_blockchain_teacher(blockchain_ursulas):
+    """A blockchain ursula serving as a teacher for the duration of the module"""
+    teacher = blockchain_ursulas[-1]
+    node_deployer = deploy_pytest_ursula_services(ursula=teacher)
+    yield teacher
+    _stop_teacher(teacher, node_deployer)
+
+
+@pytest.fixture(scope='function')
+def ursula_clock(monkeypatch):
+    """Drives the learning loop of any Ursula created during the test"""
+    clock = Clock()
+    monkeypatch.setattr(Learner, '_LEARNING_CLOCK', clock)
+    return clock
+
+
+@pytest.fixture(scope='function')
+def fast_bonding_timeout(monkeypatch):
+    """Gives up on unbonded workers after the first poll instead of sleeping through Worker.BONDING_POLL_RATE"""
+    monkeypatch.setattr(Worker, 'BONDING_TIMEOUT', 0.01)
+    monkeypatch.setattr(Worker, 'BONDING_POLL_RATE', 0.01)
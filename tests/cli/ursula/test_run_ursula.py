@@ -14,15 +14,13 @@ GNU Affero General Public License for more details.
 You should have received a copy of the GNU Affero General Public License
 along with nucypher.  If not, see <https://www.gnu.org/licenses/>.
 """
-import os
+import re
 from unittest import mock
 
 import pytest
 import pytest_twisted as pt
-import time
 from twisted.internet import threads
 
-from nucypher.blockchain.eth.actors import Worker
 from nucypher.characters.base import Learner
 from nucypher.cli import actions
 from nucypher.cli.actions import UnknownIPAddress
@@ -33,11 +31,8 @@ from nucypher.network.nodes import Teacher
 from nucypher.utilities.sandbox.constants import (
     INSECURE_DEVELOPMENT_PASSWORD,
     MOCK_URSULA_STARTING_PORT,
-    TEMPORARY_DOMAIN,
-    TEST_PROVIDER_URI,
-    MOCK_IP_ADDRESS
+    TEMPORARY_DOMAIN
 )
-from nucypher.utilities.sandbox.ursula import start_pytest_ursula_services
 
 
 @mock.patch('nucypher.config.characters.UrsulaConfiguration.default_filepath', return_value='/non/existent/file')
@@ -49,8 +44,7 @@ def test_missing_configuration_file(default_filepath_mock, click_runner):
     assert "No Ursula configurations found.  run 'nucypher ursula init' then try again." in result.output
 
 
-@pt.inlineCallbacks
-def test_run_lone_federated_default_development_ursula(click_runner):
+def test_run_lone_federated_default_development_ursula(click_runner, ursula_clock, monkeypatch):
     args = ('ursula', 'run',                            # Stat Ursula Command
             '--debug',                                  # Display log output; Do not attach console
             '--federated-only',                         # Operating Mode
@@ -60,188 +54,145 @@ def test_run_lone_federated_default_development_ursula(click_runner):
             '--lonely'                                  # Do not load seednodes
             )
 
-    result = yield threads.deferToThread(click_runner.invoke,
-                                         nucypher_cli, args,
-                                         catch_exceptions=False,
-                                         input=INSECURE_DEVELOPMENT_PASSWORD + '\n')
+    # Keep hold of the CLI ursula to observe its learning loop
+    cli_ursulas = list()
+    make_cli_character = actions.make_cli_character
+
+    def capture_cli_ursula(*args, **kwargs):
+        ursula = make_cli_character(*args, **kwargs)
+        cli_ursulas.append(ursula)
+        return ursula
+
+    monkeypatch.setattr(actions, 'make_cli_character', capture_cli_ursula)
+
+    result = click_runner.invoke(nucypher_cli, args,
+                                 catch_exceptions=False,
+                                 input=INSECURE_DEVELOPMENT_PASSWORD + '\n')
 
-    time.sleep(Learner._SHORT_LEARNING_DELAY)
     assert result.exit_code == 0
-    assert "Running" in result.output
-    assert "127.0.0.1:{}".format(MOCK_URSULA_STARTING_PORT) in result.output
+
+    # The lone ursula's learning loop runs on the test clock rather than the reactor
+    ursula = cli_ursulas.pop()
+    learning_round = ursula._learning_round
+    ursula_clock.advance(Learner._SHORT_LEARNING_DELAY)
+    assert ursula._learning_round > learning_round
+    ursula.stop_learning_loop()
+
+    assert "Running" in result.stdout
+    assert "127.0.0.1:{}".format(MOCK_URSULA_STARTING_PORT) in result.stdout
 
     reserved_ports = (UrsulaConfiguration.DEFAULT_REST_PORT, UrsulaConfiguration.DEFAULT_DEVELOPMENT_REST_PORT)
     assert MOCK_URSULA_STARTING_PORT not in reserved_ports
 
 
-@pt.inlineCallbacks
-def test_federated_ursula_learns_via_cli(click_runner, federated_ursulas):
-
-    # Establish a running Teacher Ursula
+@pt.ensureDeferred
+async def test_federated_ursula_learns_via_cli(click_runner, running_federated_teacher):
 
-    teacher = list(federated_ursulas)[0]
+    # Some Ursula is running somewhere
+    teacher = running_federated_teacher
     teacher_uri = teacher.seed_node_metadata(as_teacher_uri=True)
 
-    # Some Ursula is running somewhere
-    def run_teacher():
-        start_pytest_ursula_services(ursula=teacher)
-        return teacher_uri
-
-    def run_ursula(teacher_uri):
-
-        args = ('ursula', 'run',
-                '--debug',                                  # Display log output; Do not attach console
-                '--federated-only',                         # Operating Mode
-                '--rest-port', MOCK_URSULA_STARTING_PORT,   # Network Port
-                '--teacher', teacher_uri,
-                '--dev',                                    # Run in development mode (ephemeral node)
-                '--dry-run'                                 # Disable twisted reactor
-                )
-
-        result = yield threads.deferToThread(click_runner.invoke,
-                                             nucypher_cli, args,
-                                             catch_exceptions=False,
-                                             input=INSECURE_DEVELOPMENT_PASSWORD + '\n')
-
-        assert result.exit_code == 0
-        assert "Running Ursula" in result.output
-        assert "127.0.0.1:{}".format(MOCK_URSULA_STARTING_PORT+101) in result.output
-
-        reserved_ports = (UrsulaConfiguration.DEFAULT_REST_PORT, UrsulaConfiguration.DEFAULT_DEVELOPMENT_REST_PORT)
-        assert MOCK_URSULA_STARTING_PORT not in reserved_ports
-
-        # Check that CLI Ursula reports that it remembers the teacher and saves the TLS certificate
-        assert teacher.checksum_address in result.output
-        assert f"Saved TLS certificate for {teacher.nickname}" in result.output
-        assert f"Remembering {teacher.nickname}" in result.output
-
-    # Run the Callbacks
-    d = threads.deferToThread(run_teacher)
-    d.addCallback(run_ursula)
-
-    yield d
-
-
-@pt.inlineCallbacks
-def test_persistent_node_storage_integration(click_runner,
-                                             custom_filepath,
-                                             testerchain,
-                                             blockchain_ursulas,
-                                             agency_local_registry):
-
-    alice, ursula, another_ursula, felix, staker, *all_yall = testerchain.unassigned_accounts
-    filename = UrsulaConfiguration.generate_filename()
-    another_ursula_configuration_file_location = os.path.join(custom_filepath, filename)
-
-    init_args = ('ursula', 'init',
-                 '--provider', TEST_PROVIDER_URI,
-                 '--worker-address', another_ursula,
-                 '--network', TEMPORARY_DOMAIN,
-                 '--rest-host', MOCK_IP_ADDRESS,
-                 '--config-root', custom_filepath,
-                 '--registry-filepath', agency_local_registry.filepath,
-                 )
+    args = ('ursula', 'run',
+            '--debug',                                  # Display log output; Do not attach console
+            '--federated-only',                         # Operating Mode
+            '--rest-port', MOCK_URSULA_STARTING_PORT,   # Network Port
+            '--teacher', teacher_uri,
+            '--dev',                                    # Run in development mode (ephemeral node)
+            '--dry-run'                                 # Disable twisted reactor
+            )
+
+    result = await threads.deferToThread(click_runner.invoke,
+                                         nucypher_cli, args,
+                                         catch_exceptions=False,
+                                         input=INSECURE_DEVELOPMENT_PASSWORD + '\n')
 
-    envvars = {NUCYPHER_ENVVAR_KEYRING_PASSWORD: INSECURE_DEVELOPMENT_PASSWORD}
-    result = click_runner.invoke(nucypher_cli, init_args, catch_exceptions=False, env=envvars)
     assert result.exit_code == 0
 
-    teacher = blockchain_ursulas.pop()
-    teacher_uri = teacher.rest_information()[0].uri
+    reserved_ports = (UrsulaConfiguration.DEFAULT_REST_PORT, UrsulaConfiguration.DEFAULT_DEVELOPMENT_REST_PORT)
+    assert MOCK_URSULA_STARTING_PORT not in reserved_ports
 
-    start_pytest_ursula_services(ursula=teacher)
+    # Check that CLI Ursula is running, fetched the teacher's certificate, remembers the teacher and saves its TLS certificate
+    expected_output = {f"Starting Ursula on 127.0.0.1:{MOCK_URSULA_STARTING_PORT}",
+                       f"Fetching seednode {teacher.rest_interface.uri}",
+                       teacher.checksum_address,
+                       f"Saved TLS certificate for {teacher.nickname}",
+                       f"Remembering {teacher.nickname}"}
 
-    user_input = f'{INSECURE_DEVELOPMENT_PASSWORD}\n'
+    # Scan the console (debug) output once for all of the expected messages; None of them contains another
+    longest_first = sorted(expected_output, key=len, reverse=True)
+    expected_output_pattern = re.compile('|'.join(map(re.escape, longest_first)))
+    assert set(expected_output_pattern.findall(result.stdout)) == expected_output
 
-    run_args = ('ursula', 'run',
-                '--dry-run',
-                '--debug',
-                '--interactive',
-                '--config-file', another_ursula_configuration_file_location,
-                '--teacher', teacher_uri)
 
-    Worker.BONDING_TIMEOUT = 1
-    with pytest.raises(Teacher.DetachedWorker):
-        # Worker init success, but unassigned.
-        result = yield threads.deferToThread(click_runner.invoke,
-                                             nucypher_cli, run_args,
-                                             catch_exceptions=False,
-                                             input=user_input,
-                                             env=envvars)
-    assert result.exit_code == 0
+@pytest.mark.parametrize('with_teacher', (True, False))
+@pt.ensureDeferred
+async def test_persistent_node_storage_integration(click_runner,
+                                                   initialized_ursula_config,
+                                                   running_blockchain_teacher,
+                                                   fast_bonding_timeout,
+                                                   with_teacher):
 
-    # Run an Ursula amidst the other configuration files
+    user_input = f'{INSECURE_DEVELOPMENT_PASSWORD}\n'
+    envvars = {NUCYPHER_ENVVAR_KEYRING_PASSWORD: INSECURE_DEVELOPMENT_PASSWORD}
+
+    # Run an Ursula amidst the other configuration files, optionally learning from a teacher
     run_args = ('ursula', 'run',
                 '--dry-run',
                 '--debug',
                 '--interactive',
-                '--config-file', another_ursula_configuration_file_location)
+                '--config-file', initialized_ursula_config)
+    if with_teacher:
+        teacher_uri = running_blockchain_teacher.rest_information()[0].uri
+        run_args += ('--teacher', teacher_uri)
 
     with pytest.raises(Teacher.DetachedWorker):
         # Worker init success, but unassigned.
-        result = yield threads.deferToThread(click_runner.invoke,
-                                             nucypher_cli, run_args,
-                                             catch_exceptions=False,
-                                             input=user_input,
-                                             env=envvars)
-    assert result.exit_code == 0
-
-
-def test_ursula_rest_host_determination(click_runner):
-
-    # Patch the get_external_ip call
-    original_call = actions.get_external_ip_from_centralized_source
-    original_save = UrsulaConfiguration.to_configuration_file
-
-    try:
-        actions.get_external_ip_from_centralized_source = lambda: '192.0.2.0'
-        UrsulaConfiguration.to_configuration_file = lambda s: None
-
-        args = ('ursula', 'init',
-                '--federated-only',
-                '--network', TEMPORARY_DOMAIN,
-                )
-
-        user_input = f'Y\n{INSECURE_DEVELOPMENT_PASSWORD}\n{INSECURE_DEVELOPMENT_PASSWORD}'
-
-        result = click_runner.invoke(nucypher_cli, args, catch_exceptions=False,
-                                     input=user_input)
-
-        assert result.exit_code == 0
-        assert '(192.0.2.0)' in result.output
-
-        args = ('ursula', 'init',
-                '--federated-only',
-                '--network', TEMPORARY_DOMAIN,
-                '--force'
-                )
-
-        user_input = f'{INSECURE_DEVELOPMENT_PASSWORD}\n{INSECURE_DEVELOPMENT_PASSWORD}\n'
-
-        result = click_runner.invoke(nucypher_cli, args, catch_exceptions=False,
-                                     input=user_input)
-
-        assert result.exit_code == 0
-        assert '192.0.2.0' in result.output
-
-        # Patch get_external_ip call to error output
-        def amazing_ip_oracle():
-            raise UnknownIPAddress
-        actions.get_external_ip_from_centralized_source = amazing_ip_oracle
-
-        args = ('ursula', 'init',
-                '--federated-only',
-                '--network', TEMPORARY_DOMAIN,
-                '--force'
-                )
+        if with_teacher:
+            # The CLI ursula requests the teacher's metadata from this reactor; Invoke it off the reactor thread.
+            await threads.deferToThread(click_runner.invoke,
+                                        nucypher_cli, run_args,
+                                        catch_exceptions=False,
+                                        input=user_input,
+                                        env=envvars)
+        else:
+            click_runner.invoke(nucypher_cli, run_args,
+                                catch_exceptions=False,
+                                input=user_input,
+                                env=envvars)
+
+
+def amazing_ip_oracle():
+    raise UnknownIPAddress
+
+
+@pytest.mark.parametrize('ip_source,expected,force,exit_code', (
+    (lambda: '192.0.2.0', '(192.0.2.0)', False, 0),   # Interactive confirmation of the detected address
+    (lambda: '192.0.2.0', '192.0.2.0', True, 0),      # Forced use of the detected address
+    (amazing_ip_oracle, UnknownIPAddress, True, 1),   # Forced, but the address cannot be determined
+))
+def test_ursula_rest_host_determination(click_runner, monkeypatch, temp_dir_path, ip_source, expected, force, exit_code):
+
+    # Patch the get_external_ip call and skip saving the configuration file
+    monkeypatch.setattr(actions, 'get_external_ip_from_centralized_source', ip_source)
+    monkeypatch.setattr(UrsulaConfiguration, 'to_configuration_file', lambda config: None)
+
+    # Share one configuration root across cases instead of the default one
+    args = ('ursula', 'init',
+            '--federated-only',
+            '--network', TEMPORARY_DOMAIN,
+            '--config-root', temp_dir_path
+            )
 
-        user_input = f'{INSECURE_DEVELOPMENT_PASSWORD}\n{INSECURE_DEVELOPMENT_PASSWORD}\n'
+    user_input = f'{INSECURE_DEVELOPMENT_PASSWORD}\n{INSECURE_DEVELOPMENT_PASSWORD}\n'
+    if force:
+        args += ('--force', )
+    else:
+        user_input = f'Y\n{user_input}'
 
-        result = click_runner.invoke(nucypher_cli, args, catch_exceptions=True, input=user_input)
-        assert result.exit_code == 1
-        assert isinstance(result.exception, UnknownIPAddress)
+    result = click_runner.invoke(nucypher_cli, args, catch_exceptions=bool(exit_code), input=user_input)
 
-    finally:
-        # Unpatch call
-        actions.get_external_ip_from_centralized_source = original_call
-        UrsulaConfiguration.to_configuration_file = original_save
+    assert result.exit_code == exit_code
+    if exit_code:
+        assert isinstance(result.exception, expected)
+    else:
+        assert expected in result.output